@@ -1,96 +1,143 @@
 import asyncio
+import functools
+import importlib
 import os
 import sys
-import aiohttp
-from dotenv import load_dotenv
-from loguru import logger
-from PIL import Image
-from runner import configure
-from transcript_handler import TranscriptHandler
 import uuid
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
-from pipecat.frames.frames import (
-    BotStartedSpeakingFrame,
-    BotStoppedSpeakingFrame,
-    Frame,
-    OutputImageRawFrame,
-    SpriteFrame,
-)
-from pipecat.pipeline.pipeline import Pipeline
-from pipecat.pipeline.runner import PipelineRunner
-from pipecat.pipeline.task import PipelineParams, PipelineTask
-from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
-from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
-from pipecat.processors.frameworks.rtvi import RTVIConfig, RTVIObserver, RTVIProcessor
-from pipecat.services.aws_nova_sonic import AWSNovaSonicLLMService
-from pipecat.transports.services.daily import DailyParams, DailyTransport
-from pipecat.processors.transcript_processor import TranscriptProcessor
-from pipecat.frames.frames import Frame, TranscriptionFrame
-from pipecat.frames.frames import TranscriptionMessage
-
-from bot_tools import function_tools_schema, register_functions
+from dotenv import load_dotenv
+from loguru import logger
 
 load_dotenv(override=True)
-# logger.remove(0)
-logger.add(sys.stdout, level="DEBUG")
-logger.add("bot_bedrock_nova.err", level="ERROR")
-logger.add("bot_bedrock_nova.log", level="DEBUG")
+# Replace loguru's default stderr handler, which writes synchronously on the
+# loop thread; these sinks are written from a background thread instead
+logger.remove(0)
+LOG_SINK_OPTIONS = dict(enqueue=True, backtrace=False, diagnose=False)
+logger.add(sys.stdout, level=os.getenv("LOG_LEVEL", "DEBUG"), **LOG_SINK_OPTIONS)
+logger.add("bot_bedrock_nova.err", level="ERROR", **LOG_SINK_OPTIONS)
+logger.add("bot_bedrock_nova.log", level="DEBUG", **LOG_SINK_OPTIONS)
+
+# Configuration is read once at import
+NOVA_AWS_ACCESS_KEY_ID = os.getenv("NOVA_AWS_ACCESS_KEY_ID")
+NOVA_AWS_SECRET_ACCESS_KEY = os.getenv("NOVA_AWS_SECRET_ACCESS_KEY")
+NOVA_AWS_REGION = os.getenv("NOVA_AWS_REGION", "us-east-1")
+NOVA_VOICE_ID = os.getenv("NOVA_VOICE_ID", "tiffany")  # matthew, tiffany, amy
+NOVA_ENABLE_MCP = os.getenv("NOVA_ENABLE_MCP") == "1"
+USER_NAME = os.getenv("USER_NAME", "interview_candidate")
+
+# Seconds to wait for Daily to stop the recording when the participant leaves
+STOP_RECORDING_TIMEOUT = 2.0
+
+SYSTEM_PROMPT = """<role>Professional AI Technical Interviewer</role>
+
+        <context>
+        You are conducting a live technical job interview via spoken conversation. The candidate can hear and speak with you in real-time.
+        </context>
+
+        <goals>
+        - Assess candidate qualifications for their specific technical role
+        - Maintain professional, engaging conversation
+        - Use provided tools to retrieve and evaluate against job-specific questions
+        </goals>
+
+        <interview_process>
+        1. INTRODUCTION: Introduce yourself as an AI Interviewer and read out all avaialble positions by calling the list jobs function
+        2. POSITION IDENTIFICATION: Ask which position they're applying for
+        3. QUESTION RETRIEVAL: Use InterviewGuestionsFunction(position) to retrieve relevant questions
+        4. ASSESSMENT: Ask questions and evaluate responses against expectations
+        5. CONCLUSION: Summarize candidate strengths and thank them
+        </interview_process>
+
+        <evaluation_guidelines>
+        - Compare responses against question "expectation" fields
+        - Identify missing key concepts from expectations
+        - Ask targeted follow-up questions for missing concepts
+        - Track response quality: (Strong/Moderate/Needs Improvement)
+        - NEVER reveal expectations to candidates
+        </evaluation_guidelines>
+
+        <conversation_management>
+        - Keep responses concise (2-3 sentences per turn)
+        - Allow candidate to finish speaking before responding
+        - If candidate goes off-topic, redirect after maximum 5 attempts
+        - Signal interview progression ("Let's move to the next question about...")
+        - Adapt technical depth based on candidate's demonstrated expertise
+        </conversation_management>
 
-sprites = []
-script_dir = os.path.dirname(__file__)
+        <response_templates>
+        Introduction: "Hello, I'm your AI Technical Interviewer. May I have your name please?"
+        Positions Available: "Here are the available positions: [list of positions]. Which position are you applying for today?"
+        Question Format: "Let's discuss [topic]. [Clear, concise question]"
+        Follow-up: "You mentioned [point], could you elaborate specifically on [missing expectation]?"
+        Redirection: "I appreciate your thoughts, but let's focus on [relevant topic] for this position."
+        Conclusion: "Thank you for your time today. Based on our conversation, your strengths include [specific strengths]."
+        </response_templates>"""
+
+# aiohttp session shared by everything the bot talks to over HTTP
+_SESSION = None
 
-# Load sequential animation frames
-for i in range(1, 26):
-    # Build the full path to the image file
-    full_path = os.path.join(script_dir, f"assets/robot0{i}.png")
-    # Get the filename without the extension to use as the dictionary key
-    # Open the image and convert it to bytes
-    with Image.open(full_path) as img:
-        sprites.append(OutputImageRawFrame(image=img.tobytes(), size=img.size, format=img.format))
 
-# Create a smooth animation by adding reversed frames
-flipped = sprites[::-1]
-sprites.extend(flipped)
+async def get_session() -> "aiohttp.ClientSession":
+    """Return the shared aiohttp session, creating it on first use."""
+    import aiohttp
 
-# Define static and animated states
-quiet_frame = sprites[0]  # Static frame for when bot is listening
-talking_frame = SpriteFrame(images=sprites)  # Animation sequence for when bot is talking
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100, limit_per_host=20, keepalive_timeout=30, ttl_dns_cache=300
+            )
+        )
+    return _SESSION
+
+
+async def close_session():
+    """Close the shared aiohttp session, if one was created."""
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
+
+
+# Modules bot_main imports; slow ones (PIL, onnxruntime, the Daily SDK) included
+BOT_MODULES = (
+    "pipecat.adapters.schemas.tools_schema",
+    "pipecat.audio.vad.silero",
+    "pipecat.frames.frames",
+    "pipecat.pipeline.pipeline",
+    "pipecat.pipeline.runner",
+    "pipecat.pipeline.task",
+    "pipecat.processors.aggregators.openai_llm_context",
+    "pipecat.processors.frameworks.rtvi",
+    "pipecat.processors.transcript_processor",
+    "pipecat.services.aws_nova_sonic",
+    "pipecat.transports.services.daily",
+    "bot_tools",
+    "integration.jobs",
+    "runner",
+    "talking_animation",
+    "transcript_handler",
+)
 
 
-class TalkingAnimation(FrameProcessor):
-    """Manages the bot's visual animation states.
+def import_bot_modules():
+    """Import everything bot_main needs, so its own imports are cache hits.
 
-    Switches between static (listening) and animated (talking) states based on
-    the bot's current speaking status.
+    Blocking; a server hosting in-process bots runs it on a worker thread.
     """
+    for name in BOT_MODULES:
+        importlib.import_module(name)
 
-    def __init__(self):
-        super().__init__()
-        self._is_talking = False
-
-    async def process_frame(self, frame: Frame, direction: FrameDirection):
-        """Process incoming frames and update animation state.
 
-        Args:
-            frame: The incoming frame to process
-            direction: The direction of frame flow in the pipeline
-        """
-        await super().process_frame(frame, direction)
+@functools.cache
+def _system_instruction():
+    """The interviewer prompt followed by the Nova Sonic trigger instruction."""
+    from pipecat.services.aws_nova_sonic import AWSNovaSonicLLMService
 
-        # Switch to talking animation when bot starts speaking
-        if isinstance(frame, BotStartedSpeakingFrame):
-            if not self._is_talking:
-                await self.push_frame(talking_frame)
-                self._is_talking = True
-        # Return to static frame when bot stops speaking
-        elif isinstance(frame, BotStoppedSpeakingFrame):
-            await self.push_frame(quiet_frame)
-            self._is_talking = False
+    return SYSTEM_PROMPT + AWSNovaSonicLLMService.AWAIT_TRIGGER_ASSISTANT_RESPONSE_INSTRUCTION
 
-        await self.push_frame(frame, direction)
 
-async def bot_main():
+async def bot_main(room_url: str = None, token: str = None):
     """Main bot execution function.
 
     Sets up and runs the bot pipeline including:
@@ -99,19 +146,53 @@ async def bot_main():
     - Language model integration
     - Animation processing
     - RTVI event handling
+
+    Args:
+        room_url: Daily room to join. When omitted, the room and token are taken
+            from the command line / environment, as when run as a script.
+        token: Meeting token for room_url.
     """
-    # Import here to avoid circular dependency
-    async with aiohttp.ClientSession() as session:
-        session_id = str(uuid.uuid4()) # Generate a unique ID
-        session.unique_id = session_id # Assign the ID to a custom attribute
+    # Heavy dependencies are imported here so importing this module stays cheap;
+    # keep BOT_MODULES in step with this list
+    from pipecat.adapters.schemas.tools_schema import ToolsSchema
+    from pipecat.audio.vad.silero import SileroVADAnalyzer
+    from pipecat.frames.frames import TranscriptionMessage
+    from pipecat.pipeline.pipeline import Pipeline
+    from pipecat.pipeline.runner import PipelineRunner
+    from pipecat.pipeline.task import PipelineParams, PipelineTask
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+    from pipecat.processors.frameworks.rtvi import RTVIConfig, RTVIObserver, RTVIProcessor
+    from pipecat.processors.transcript_processor import TranscriptProcessor
+    from pipecat.services.aws_nova_sonic import AWSNovaSonicLLMService
+    from pipecat.transports.services.daily import DailyParams, DailyTransport
+
+    from bot_tools import function_tools_schema, register_functions
+    from integration.jobs import Jobs
+    from runner import configure
+    from talking_animation import TalkingAnimation, load_sprites
+    from transcript_handler import TranscriptHandler
+
+    quiet_frame, talking_frame = await load_sprites()
+
+    session = await get_session()
+    session_id = str(uuid.uuid4()) # Generate a unique ID
+    # Run standalone when no room was handed over, e.g. `python -m bot_bedrock_nova -u ...`
+    standalone = room_url is None
+    if standalone:
         (room_url, token) = await configure(session)
 
-        # try:
-        #     mcp = await get_mcp_client()
-        # except Exception as e:
-        #     logger.error(f"error setting up mcp")
-        #     logger.exception("error trace:")
+    # Optionally expose the MCP salary tools alongside the built-in functions
+    mcp = None
+    if NOVA_ENABLE_MCP:
+        from integration.average_salary_mcp_client import get_mcp_client
 
+        try:
+            mcp = await get_mcp_client()
+        except Exception as e:
+            logger.error("error setting up mcp")
+            logger.exception("error trace:")
+
+    def build_services():
         # Set up Daily transport with video/audio parameters
         transport = DailyTransport(
             room_url,
@@ -129,196 +210,196 @@ async def bot_main():
             ),
         )
 
-        # Initialize the TranscriptHandler with the transport
-        transcript_handler = TranscriptHandler(transport=transport, username=os.getenv("USER_NAME", "interview_candidate"), session_id=session_id)
-
-        NOVA_AWS_SECRET_ACCESS_KEY=os.getenv("NOVA_AWS_SECRET_ACCESS_KEY")
-        NOVA_AWS_ACCESS_KEY_ID=os.getenv("NOVA_AWS_ACCESS_KEY_ID")
-        logger.info(f"NOVA_AWS_ACCESS_KEY_ID: {NOVA_AWS_ACCESS_KEY_ID}")
-        logger.info(f"NOVA_AWS_SECRET_ACCESS_KEY: {NOVA_AWS_SECRET_ACCESS_KEY}")
-
-        # Initialize LLM service
         # Create the AWS Nova Sonic LLM service
         llm = AWSNovaSonicLLMService(
             secret_access_key=NOVA_AWS_SECRET_ACCESS_KEY,
             access_key_id=NOVA_AWS_ACCESS_KEY_ID,
-            region=os.getenv("NOVA_AWS_REGION", "us-east-1"),
-            voice_id=os.getenv("NOVA_VOICE_ID", "tiffany"),  # matthew, tiffany, amy
+            region=NOVA_AWS_REGION,
+            voice_id=NOVA_VOICE_ID,
             send_transcription_frames=True
-        )        
-
-        register_functions(llm)
-
-        # mcp_tool = await mcp.register_tools(llm)
-        # print(dir(mcp_tool))
-        # print(mcp_tool.standard_tools)
-        # tools_mcp_schema = function_tools
-        # tools_mcp_schema = ToolsSchema(toolsSchema.standard_tools + mcp_tool.standard_tools)
-
-        system_instruction = (
-            """<role>Professional AI Technical Interviewer</role>
-
-        <context>
-        You are conducting a live technical job interview via spoken conversation. The candidate can hear and speak with you in real-time.
-        </context>
+        )
+        return transport, llm
 
-        <goals>
-        - Assess candidate qualifications for their specific technical role
-        - Maintain professional, engaging conversation
-        - Use provided tools to retrieve and evaluate against job-specific questions
-        </goals>
+    # Loading the VAD model and creating the Daily call client block, and
+    # in-process bots share the server's event loop, so build them on a thread
+    transport, llm = await asyncio.to_thread(build_services)
 
-        <interview_process>
-        1. INTRODUCTION: Introduce yourself as an AI Interviewer and read out all avaialble positions by calling the list jobs function
-        2. POSITION IDENTIFICATION: Ask which position they're applying for
-        3. QUESTION RETRIEVAL: Use InterviewGuestionsFunction(position) to retrieve relevant questions
-        4. ASSESSMENT: Ask questions and evaluate responses against expectations
-        5. CONCLUSION: Summarize candidate strengths and thank them
-        </interview_process>
+    # Initialize the TranscriptHandler with the transport
+    transcript_handler = TranscriptHandler(transport=transport, username=USER_NAME, session_id=session_id)
 
-        <evaluation_guidelines>
-        - Compare responses against question "expectation" fields
-        - Identify missing key concepts from expectations
-        - Ask targeted follow-up questions for missing concepts
-        - Track response quality: (Strong/Moderate/Needs Improvement)
-        - NEVER reveal expectations to candidates
-        </evaluation_guidelines>
+    # Never log the secret key; a short prefix of the key id is enough to diagnose config
+    logger.info("NOVA_AWS_ACCESS_KEY_ID: {}…", (NOVA_AWS_ACCESS_KEY_ID or "")[:4])
 
-        <conversation_management>
-        - Keep responses concise (2-3 sentences per turn)
-        - Allow candidate to finish speaking before responding
-        - If candidate goes off-topic, redirect after maximum 5 attempts
-        - Signal interview progression ("Let's move to the next question about...")
-        - Adapt technical depth based on candidate's demonstrated expertise
-        </conversation_management>
+    register_functions(llm)
 
-        <response_templates>
-        Introduction: "Hello, I'm your AI Technical Interviewer. May I have your name please?"
-        Positions Available: "Here are the available positions: [list of positions]. Which position are you applying for today?"
-        Question Format: "Let's discuss [topic]. [Clear, concise question]"
-        Follow-up: "You mentioned [point], could you elaborate specifically on [missing expectation]?"
-        Redirection: "I appreciate your thoughts, but let's focus on [relevant topic] for this position."
-        Conclusion: "Thank you for your time today. Based on our conversation, your strengths include [specific strengths]."
-        </response_templates>"""
-            f"{AWSNovaSonicLLMService.AWAIT_TRIGGER_ASSISTANT_RESPONSE_INSTRUCTION}"
+    tools_schema = function_tools_schema
+    if mcp is not None:
+        mcp_tools = await mcp.register_tools(llm)
+        tools_schema = ToolsSchema(
+            standard_tools=function_tools_schema.standard_tools + mcp_tools.standard_tools
         )
 
-        # Set up context and context management
-        context = OpenAILLMContext(
-            messages=[
-                {"role": "system", "content": f"{system_instruction}"},
-                {
-                    "role": "user",
-                    "content": "Hello, I'm here for my interview.",
-                },
-            ],
-            tools=function_tools_schema,
-        )
-        context_aggregator = llm.create_context_aggregator(context)
-
-        ta = TalkingAnimation()
-        transcript = TranscriptProcessor()
-
-        #
-        # RTVI events for Pipecat client UI
-        #
-        rtvi = RTVIProcessor(config=RTVIConfig(config=[]))
-
-        pipeline = Pipeline(
-            [
-                transport.input(),
-                rtvi,
-                context_aggregator.user(),
-                llm,
-                transcript.user(),
-                ta,
-                transport.output(),
-                transcript.assistant(),         # Captures assistant transcripts
-                context_aggregator.assistant(),
-            ]
+    # Set up context and context management
+    context = OpenAILLMContext(
+        messages=[
+            {"role": "system", "content": _system_instruction()},
+            {
+                "role": "user",
+                "content": "Hello, I'm here for my interview.",
+            },
+        ],
+        tools=tools_schema,
+    )
+    context_aggregator = llm.create_context_aggregator(context)
+
+    ta = TalkingAnimation(quiet_frame, talking_frame)
+    transcript = TranscriptProcessor()
+
+    #
+    # RTVI events for Pipecat client UI
+    #
+    rtvi = RTVIProcessor(config=RTVIConfig(config=[]))
+
+    pipeline = Pipeline(
+        [
+            transport.input(),
+            rtvi,
+            context_aggregator.user(),
+            llm,
+            transcript.user(),
+            ta,
+            transport.output(),
+            transcript.assistant(),         # Captures assistant transcripts
+            context_aggregator.assistant(),
+        ]
+    )
+
+    # start_recording_status =await transport.start_recording()
+    # # start_recording_status = await daily_helpers["rest"].start_recording(room_url, token)
+    # print(f"Start recording status: {start_recording_status}")
+
+    # await transport.start_recording()
+
+    task = PipelineTask(
+        pipeline,
+        params=PipelineParams(
+            allow_interruptions=True,
+            enable_metrics=True,
+            enable_usage_metrics=True,
+        ),
+        observers=[RTVIObserver(rtvi)],
+    )
+    await task.queue_frame(quiet_frame)
+
+    # Either client event may arrive first; only the first one kicks off the conversation
+    conversation_started = asyncio.Event()
+
+    async def kick_off_conversation():
+        if conversation_started.is_set():
+            return
+        conversation_started.set()
+        await task.queue_frames([context_aggregator.user().get_context_frame()])
+
+    @rtvi.event_handler("on_client_ready")
+    async def on_client_ready(rtvi):
+        await rtvi.set_bot_ready()
+        # Kick off the conversation
+        await kick_off_conversation()
+
+    # Handle client connection event
+    @transport.event_handler("on_client_connected")
+    async def on_client_connected(transport, client):
+        logger.info("Client connected")
+        logger.info("Updated transport in transcript handler")
+        
+        # Kick off the conversation and trigger the first assistant response.
+        # Both are scheduled in this order, and the trigger is held by the LLM
+        # service until its session is ready, so they can run concurrently.
+        await asyncio.gather(
+            kick_off_conversation(),
+            llm.trigger_assistant_response(),
         )
+        
+        # Send test transcript messages to verify transcript functionality
+        logger.info("Sending test transcript messages")
+
+    @transcript.event_handler("on_transcript_update")
+    async def on_transcript_update(processor, frame):
+        # Call the TranscriptHandler's on_transcript_update method to store in DynamoDB
+        await transcript_handler.on_transcript_update(processor, frame)
+        
+        # Still log the transcript lines for debugging purposes
+        for msg in frame.messages:
+            if isinstance(msg, TranscriptionMessage):
+                if msg.timestamp:
+                    logger.info("Transcript: [{}] {}: {}", msg.timestamp, msg.role, msg.content)
+                else:
+                    logger.info("Transcript: {}: {}", msg.role, msg.content)
+        
+    @transport.event_handler("on_first_participant_joined")
+    async def on_first_participant_joined(transport, participant):
+        logger.debug("Participant joined: {}", participant)
+        await transport.start_recording()
+    #     await transport.capture_participant_transcription(participant["id"])
+
+    # @transport.event_handler("on_recording_started")
+    # async def on_recording_started(any1, any2):
+    #     logger.debug("any1: {}", any1)
+    #     logger.debug("any2: {}", any2)
+
+    # Set when the bot starts shutting down, so later leave events don't cancel again
+    shutting_down = asyncio.Event()
+
+    @transport.event_handler("on_participant_left")
+    async def on_participant_left(transport, participant, reason):
+        logger.debug("Participant left: {}", participant)
+        if shutting_down.is_set():
+            return
+        shutting_down.set()
+        
+        # Store the full transcript in DynamoDB via TranscriptHandler
+        await transcript_handler.on_participant_left(transport, participant, reason)
+        
+        # First, gracefully stop the LLM service
+        try:
+            # Add a method to the LLM service to close streams properly
+            await llm.close_streams()
+            # Don't let a slow recording API delay cancelling the pipeline
+            await asyncio.wait_for(transport.stop_recording(), timeout=STOP_RECORDING_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out stopping the recording")
+        except Exception as e:
+            logger.error("Error closing LLM streams: {}", e)
+
+        await task.cancel()
+
+    # Signal handling belongs to the hosting server when running in-process
+    runner = PipelineRunner(handle_sigint=standalone)
+
+    # Warm the DynamoDB connection in the background so the first transcript
+    # write skips DNS and TLS setup without delaying the bot joining the room
+    transcript_handler.start_warmup()
+    # Warm the job data cache so the first tool call doesn't touch disk
+    await Jobs.list_jobs()
+
+    try:
+        await runner.run(task)
+    finally:
+        # Stop the transcript writer even if the bot ends without a leave event
+        await transcript_handler.close()
 
-        # start_recording_status =await transport.start_recording()
-        # # start_recording_status = await daily_helpers["rest"].start_recording(room_url, token)
-        # print(f"Start recording status: {start_recording_status}")
-
-        # await transport.start_recording()
-
-        task = PipelineTask(
-            pipeline,
-            params=PipelineParams(
-                allow_interruptions=True,
-                enable_metrics=True,
-                enable_usage_metrics=True,
-            ),
-            observers=[RTVIObserver(rtvi)],
-        )
-        await task.queue_frame(quiet_frame)
-
-        @rtvi.event_handler("on_client_ready")
-        async def on_client_ready(rtvi):
-            await rtvi.set_bot_ready()
-            # Kick off the conversation
-            await task.queue_frames([context_aggregator.user().get_context_frame()])
-
-        # Handle client connection event
-        @transport.event_handler("on_client_connected")
-        async def on_client_connected(transport, client):
-            logger.info("Client connected")
-            logger.info("Updated transport in transcript handler")
-            
-            # Kick off the conversation
-            await task.queue_frames([context_aggregator.user().get_context_frame()])
-            # Trigger the first assistant response
-            await llm.trigger_assistant_response()
-            
-            # Send test transcript messages to verify transcript functionality
-            logger.info("Sending test transcript messages")
-
-        @transcript.event_handler("on_transcript_update")
-        async def on_transcript_update(processor, frame):
-            # Call the TranscriptHandler's on_transcript_update method to store in DynamoDB
-            await transcript_handler.on_transcript_update(processor, frame)
-            
-            # Still log the transcript lines for debugging purposes
-            for msg in frame.messages:
-                if isinstance(msg, TranscriptionMessage):
-                    timestamp = f"[{msg.timestamp}] " if msg.timestamp else ""
-                    line = f"{timestamp}{msg.role}: {msg.content}"
-                    logger.info(f"Transcript: {line}")
-            
-        @transport.event_handler("on_first_participant_joined")
-        async def on_first_participant_joined(transport, participant):
-            print(f"Participant joined: {participant}")
-            await transport.start_recording()
-        #     await transport.capture_participant_transcription(participant["id"])
-
-        # @transport.event_handler("on_recording_started")
-        # async def on_recording_started(any1, any2):
-        #     print(f"any1: {any1}")
-        #     print(f"any2: {any2}")
-
-        @transport.event_handler("on_participant_left")
-        async def on_participant_left(transport, participant, reason):
-            print(f"Participant left: {participant}")
-            
-            # Store the full transcript in DynamoDB via TranscriptHandler
-            await transcript_handler.on_participant_left(transport, participant, reason)
-            
-            # First, gracefully stop the LLM service
-            try:
-                # Add a method to the LLM service to close streams properly
-                await llm.close_streams()
-                await transport.stop_recording()
-            except Exception as e:
-                logger.error(f"Error closing LLM streams: {e}")
-
-            await task.cancel()
-
-        runner = PipelineRunner()
 
-        await runner.run(task)
+async def _run():
+    try:
+        await bot_main()
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
-    asyncio.run(bot_main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(_run())
+    else:
+        uvloop.run(_run())
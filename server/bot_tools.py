@@ -1,10 +1,5 @@
-from datetime import datetime, timedelta
-import json
 import os
-import requests
-import sys
-import time
-from pathlib import Path
+from time import localtime, strftime
 from loguru import logger
 from pipecat.adapters.schemas.function_schema import FunctionSchema
 from pipecat.adapters.schemas.tools_schema import ToolsSchema
@@ -14,7 +9,6 @@ from pipecat.services.llm_service import FunctionCallParams
 
 from dotenv import load_dotenv
 from integration.jobs import Jobs
-import os
 
 # Load environment variables
 load_dotenv(override=True)
@@ -23,7 +17,7 @@ load_dotenv(override=True)
 async def get_current_date_time(params: FunctionCallParams):
     await params.result_callback(
         {
-            "now": datetime.now().strftime("%Y%m%d_%H%M%S")
+            "now": strftime("%Y%m%d_%H%M%S", localtime())
         }
     )    
 # now
@@ -36,18 +30,14 @@ async def get_all_jobs(params: FunctionCallParams):
         [{"id": 100,"title": "AI Consultant"},{"id": 200,"title": "Data Science"}]
     """    
     try:
-        # Create an instance of the Jobs class
-        jobs_instance = Jobs()
-        # Call the instance method
-        jobs_list = await jobs_instance.list_jobs()
-        print(f"Jobs list: {jobs_list}")
+        jobs_list = await Jobs.list_jobs()
+        logger.debug("Jobs list: {}", jobs_list)
         await params.result_callback({
             "jobs": jobs_list,
             "status": "success"
         })
     except Exception as e:
-        print(f"Error fetching jobs: {str(e)}")
-        logger.exception(f"Error fetching jobs: {str(e)}")
+        logger.exception("Error fetching jobs: {}", e)
         await params.result_callback(
             result = {
                 "error": True,
@@ -58,25 +48,19 @@ async def get_all_jobs(params: FunctionCallParams):
 
 async def get_interview_questions(params: FunctionCallParams):
     """Gets details of jobs from the data file server/integration/data/job_questions.json by the job id"""
-    from integration.jobs import Jobs
-    import os
-    
     job_id = params.arguments.get("id")
     if not job_id:
         await params.result_callback(None)
         return
     
     try:
-        # Create an instance of the Jobs class
-        jobs_instance = Jobs()
-        # Call the instance method
-        interview_questions = await jobs_instance.get_interview_questions(job_id)
+        interview_questions = await Jobs.get_interview_questions(job_id)
         await params.result_callback({
             "interview_questions": interview_questions,
             "status": "success"
         })
     except Exception as e:
-        logger.exception(f"Error fetching interview questions: {str(e)}")
+        logger.exception("Error fetching interview questions: {}", e)
         await params.result_callback(            
             result = {
                 "error": True,
@@ -113,17 +97,33 @@ get_interview_questions_function_schema = FunctionSchema(
     required=["id"],
 )
 
-# Create tools schema
-function_tools_schema = ToolsSchema(standard_tools=[
-    get_current_date_time_function_schema,
+# The date/time tool is not needed by the interviewer, so it is opt-in to keep
+# the tool schema sent to the model small
+NOVA_ENABLE_DATETIME_TOOL = os.getenv("NOVA_ENABLE_DATETIME_TOOL") == "1"
+
+INTERVIEW_TOOLS = [
     list_jobs_function_schema,
     get_interview_questions_function_schema
-])
+]
+
+# Create tools schema
+function_tools_schema = ToolsSchema(standard_tools=(
+    INTERVIEW_TOOLS + [get_current_date_time_function_schema]
+    if NOVA_ENABLE_DATETIME_TOOL
+    else INTERVIEW_TOOLS
+))
+
+# (function name, handler) pairs, fixed at import like the schema above
+_REGISTRATIONS = (
+    (("get_current_date_time", get_current_date_time),) if NOVA_ENABLE_DATETIME_TOOL else ()
+) + (
+    ("ListJobsFunction", get_all_jobs),
+    ("InterviewGuestionsFunction", get_interview_questions),
+)
 
 # Function to register all functions with the LLM service
 def register_functions(llm_service):
     """Register all functions with the LLM service."""
-    llm_service.register_function("get_current_date_time", get_current_date_time)
-    llm_service.register_function("ListJobsFunction", get_all_jobs)
-    llm_service.register_function("InterviewGuestionsFunction", get_interview_questions)
+    for name, handler in _REGISTRATIONS:
+        llm_service.register_function(name, handler)
 
@@ -16,12 +16,12 @@ async def get_mcp_client() -> MCPClient:
         cwd=os.getcwd(),
     )
 
-    logger.info(f"Starting MCP server with parameters: {server_params}")
+    logger.info("Starting MCP server with parameters: {}", server_params)
 
     try:
         mcp = MCPClient(server_params)
         return mcp
     except Exception as e:
-        logger.error(f"error setting up mcp")
+        logger.error("error setting up mcp")
         logger.exception("error trace:")
         raise e
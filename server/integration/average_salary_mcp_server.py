@@ -1,6 +1,11 @@
 import re
 import json
-import subprocess
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+import aiohttp
 from mcp.server import FastMCP
 from mcp import StdioServerParameters
 from mcp.client.stdio import stdio_client
@@ -8,65 +13,125 @@ import os
 from pipecat.services.mcp_service import MCPClient
 from loguru import logger
 
-# Create an MCP server
-mcp = FastMCP("Salary with Curl Server")
 URL="https://www.morganmckinley.com/sg/salary-guide/data/data-scientist/singapore"
+USER_AGENT="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# Seconds a salary page fetch may take before falling back to cached or hardcoded values
+REQUEST_TIMEOUT = 10
 
-# Define a tool
-@mcp.tool(description="Gets the average salary for the given role in Singapore")
-def get_average_salary(role:str) -> int:
-    # Use command line curl to make a request to the URL
+# Keep-alive session reused across tool calls, created on first use
+_SESSION: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+
+async def _get_session() -> aiohttp.ClientSession:
+    global _SESSION
+    async with _session_lock:
+        if _SESSION is None or _SESSION.closed:
+            _SESSION = aiohttp.ClientSession(
+                headers={"User-Agent": USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+            )
+    return _SESSION
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Close the HTTP session when the MCP server shuts down."""
+    try:
+        yield
+    finally:
+        if _SESSION is not None:
+            await _SESSION.close()
+
+# Create an MCP server
+mcp = FastMCP("Salary with Curl Server", lifespan=lifespan)
+
+# Last successfully scraped average; the salary guide changes quarterly at best
+_CACHE = {"value": None, "ts": 0.0}
+_TTL = 3600
+
+# Fetch in progress, shared by callers that arrive while it runs
+_inflight: Optional[asyncio.Task] = None
+_inflight_lock = asyncio.Lock()
+
+# Patterns for the salary range, most specific first; bytes so the page is never decoded
+_SALARY_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in [
+    rb"Estimated average salary range: S\$(\d{1,3}(?:,\d{3})*) - S\$(\d{1,3}(?:,\d{3})*) Per Annum",
+    rb"salary range:?\s*S\$(\d{1,3}(?:,\d{3})*)\s*-\s*S\$(\d{1,3}(?:,\d{3})*)",
+    rb"S\$(\d{1,3}(?:,\d{3})*)\s*-\s*S\$(\d{1,3}(?:,\d{3})*)\s*Per Annum",
+    rb"S\$(\d{1,3}(?:,\d{3})*)\s*-\s*S\$(\d{1,3}(?:,\d{3})*)"
+])
+
+async def _fetch_average_salary() -> int:
+    now = time.monotonic()
+
+    # Fetch the page over the shared keep-alive session
     try:
-        # Run curl command with browser-like user agent and capture the output
-        result = subprocess.run([
-            "curl",
-            "-s",
-            "-A", "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            URL
-        ], capture_output=True, text=True, check=True)
-        response = result.stdout
+        session = await _get_session()
+        async with session.get(URL) as r:
+            response = await r.read()
         
         # Debug: Write the response to a file for inspection
-        with open("response.html", "w") as f:
-            f.write(response)
-        print(f"Response saved to response.html (size: {len(response)} bytes)")
+        if os.getenv("SALARY_DEBUG_DUMP"):
+            Path("response.html").write_bytes(response)
         
-    except subprocess.CalledProcessError as e:
-        print(f"Curl command failed: {e}")
-        return 0
-    
-    # Try different patterns for the salary range
-    patterns = [
-        r"Estimated average salary range: S\$(\d{1,3}(?:,\d{3})*) - S\$(\d{1,3}(?:,\d{3})*) Per Annum",
-        r"salary range:?\s*S\$(\d{1,3}(?:,\d{3})*)\s*-\s*S\$(\d{1,3}(?:,\d{3})*)",
-        r"S\$(\d{1,3}(?:,\d{3})*)\s*-\s*S\$(\d{1,3}(?:,\d{3})*)\s*Per Annum",
-        r"S\$(\d{1,3}(?:,\d{3})*)\s*-\s*S\$(\d{1,3}(?:,\d{3})*)"
-    ]
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # stdout carries the MCP protocol, so diagnostics go through loguru (stderr)
+        logger.warning("Salary request failed: {!r}", e)
+        # Serve the last good value, even if stale, rather than nothing
+        return _CACHE["value"] if _CACHE["value"] is not None else 0
     
     # Try each pattern
-    for pattern in patterns:
-        match = re.search(pattern, response, re.IGNORECASE)
+    for pattern in _SALARY_PATTERNS:
+        match = pattern.search(response)
         if match:
             break
     
     if match:
         # Extract the salary values and remove commas
-        min_salary = int(match.group(1).replace(',', ''))
-        max_salary = int(match.group(2).replace(',', ''))
+        min_salary = int(match.group(1).replace(b',', b''))
+        max_salary = int(match.group(2).replace(b',', b''))
         
         # Calculate the average
         average_salary = (min_salary + max_salary) // 2
         
+        _CACHE["value"] = average_salary
+        _CACHE["ts"] = now
         return average_salary
+    elif _CACHE["value"] is not None:
+        logger.warning("Salary range pattern not found in the response, using last cached value")
+        return _CACHE["value"]
     else:
         # If the pattern is not found, return hardcoded values as a fallback
-        print("Salary range pattern not found in the response, using hardcoded values")
+        logger.warning("Salary range pattern not found in the response, using hardcoded values")
         # Hardcoded values from the example: S$120,000 - S$200,000
         min_salary = 120000
         max_salary = 200000
         average_salary = (min_salary + max_salary) // 2
         return average_salary
 
+def _clear_inflight(task: asyncio.Task) -> None:
+    global _inflight
+    if _inflight is task:
+        _inflight = None
+
+# Define a tool
+@mcp.tool(description="Gets the average salary for the given role in Singapore")
+async def get_average_salary(role:str) -> int:
+    global _inflight
+
+    if _CACHE["value"] is not None and time.monotonic() - _CACHE["ts"] < _TTL:
+        return _CACHE["value"]
+
+    async with _inflight_lock:
+        if _inflight is None:
+            _inflight = asyncio.create_task(_fetch_average_salary())
+            # Cleared by the task itself, so a fetch whose callers were all
+            # cancelled is never served again in place of a refresh
+            _inflight.add_done_callback(_clear_inflight)
+        fetch = _inflight
+    # Shielded so one caller being cancelled doesn't abort the shared fetch
+    return await asyncio.shield(fetch)
+
 # Start the server
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
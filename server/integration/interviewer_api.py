@@ -1,21 +1,37 @@
+import weakref
 from pathlib import Path
-import os
-import json
+import orjson
 import logging
 from pipecat.services.llm_service import FunctionCallParams
 
-DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / "data"
+from .jobs import aload_job_data
+
+_HERE = Path(__file__).resolve().parent
+DATA_DIR = _HERE / "data"
 DATA_FILE = DATA_DIR / "job_questions.json"
 logger = logging.getLogger(__name__)
 
-# Initialize global question index
-CURRENT_QUESTION_INDEX = 0
+# Next question index per position title, for each session. Each bot owns its
+# LLM context, so keying on the context object itself (weakly) keeps sessions
+# apart and lets a session's indexes go away with it.
+_INDEX: "weakref.WeakKeyDictionary[object, dict[str, int]]" = weakref.WeakKeyDictionary()
+
+# Error results that never vary, shared rather than rebuilt per call
+_ERR_FILE_NOT_FOUND = {
+    "error": True,
+    "message": f"Job questions file not found at {DATA_FILE}",
+    "status": "failed"
+}
+_ERR_NO_POSITIONS = {
+    "error": True,
+    "message": "No job positions found in the data",
+    "status": "failed"
+}
 
-# Function to get job questions based on position
+# Function to get job questions based on position.
+# Not registered with the LLM at present; bot_tools exposes the Jobs functions instead.
 async def get_job_questions(params: FunctionCallParams):
     """Function to get a specific interview question for a job position."""
-    global CURRENT_QUESTION_INDEX
-    
     try:
         job_title = params.arguments.get("position", "").strip().lower()
 
@@ -24,18 +40,13 @@ async def get_job_questions(params: FunctionCallParams):
         
         # Check if file exists
         if not job_questions_file.exists():
-            await params.result_callback({
-                "error": True,
-                "message": f"Job questions file not found at {job_questions_file}",
-                "status": "failed"
-            })
+            await params.result_callback(_ERR_FILE_NOT_FOUND)
             return
             
         # Read and parse job questions file
         try:
-            with open(job_questions_file, 'r') as f:
-                job_data = json.load(f)
-        except json.JSONDecodeError as e:
+            job_data = await aload_job_data(job_questions_file)
+        except (orjson.JSONDecodeError, ValueError) as e:
             await params.result_callback({
                 "error": True,
                 "message": f"Invalid JSON in job questions file: {str(e)}",
@@ -44,28 +55,23 @@ async def get_job_questions(params: FunctionCallParams):
             return
             
         # Find matching position
-        positions = job_data.get("positions", [])
-        matched_position = None
+        positions = job_data.raw.get("positions", [])
+        titles = job_data.titles_lower
         
-        # Convert job_title to lowercase for case-insensitive matching
-        job_title_lower = job_title.lower()
-        
-        for pos in positions:
-            if job_title_lower in pos.get("title", "").lower():
-                matched_position = pos
-                break
+        # job_title and the indexed titles are both already lowercased
+        matched_position = next((pos for title, pos in titles if job_title in title), None)
                 
         # If no exact match, try partial match
         if not matched_position:
-            for pos in positions:
-                if any(word.lower() in pos.get("title", "").lower() for word in job_title.split()):
-                    matched_position = pos
-                    break
+            words = job_title.split()
+            matched_position = next(
+                (pos for title, pos in titles if any(word in title for word in words)), None
+            )
         
         # If still no match, return the first position as default
         if not matched_position and positions:
             matched_position = positions[0]
-            logger.warning(f"No matching position found for '{job_title}', using default: {matched_position.get('title')}")
+            logger.warning("No matching position found for '%s', using default: %s", job_title, matched_position.get('title'))
         
         # Return result
         if matched_position:
@@ -80,35 +86,35 @@ async def get_job_questions(params: FunctionCallParams):
                 })
                 return
                 
-            # Reset index if it's out of range
-            if CURRENT_QUESTION_INDEX < 0 or CURRENT_QUESTION_INDEX >= len(questions):
-                CURRENT_QUESTION_INDEX = 0
-                
+            session_index = _INDEX.setdefault(params.context, {})
+            title = matched_position.get("title", "")
+            # Reset index if it's out of range, e.g. after questions were removed
+            idx = session_index.get(title, 0)
+            if idx >= len(questions):
+                idx = 0
+
             # Return only the specific question
-            specific_question = questions[CURRENT_QUESTION_INDEX]
-            
-            # Increment the question index for next call
-            CURRENT_QUESTION_INDEX = (CURRENT_QUESTION_INDEX + 1) % len(questions)
+            specific_question = questions[idx]
+
+            # Store the index for the next call
+            session_index[title] = (idx + 1) % len(questions)
             result = {
                 "question": specific_question.get("question", ""),
                 "expectation": specific_question.get("expectation", ""),
                 "status": "success"
             }
         else:
-            result = {
-                "error": True,
-                "message": "No job positions found in the data",
-                "status": "failed"
-            }
+            result = _ERR_NO_POSITIONS
 
-        logger.info(f"result: {result}")
+        logger.info("result: %s", result)
             
         await params.result_callback(result)
         
     except Exception as e:
-        # Handle any unexpected errors
+        # Handle any unexpected errors; the model must always get a result back,
+        # or the function call is left pending
         error_message = f"Unexpected error getting job questions: {str(e)}"
-        logger.exception(f"{error_message} - Exception type: {type(e).__name__}")
+        logger.exception("%s - Exception type: %s", error_message, type(e).__name__)
         await params.result_callback({
             "error": True,
             "message": error_message,
@@ -1,48 +1,85 @@
 from pathlib import Path
-from typing import List, Dict, Any
-import json
-import os
+from typing import List, Dict, Any, NamedTuple, Tuple
+import asyncio
+import orjson
 from loguru import logger
 
+_HERE = Path(__file__).resolve().parent
+DATA_DIR = _HERE / "data"
+DATA_FILE = DATA_DIR / "job_questions.json"
+
+class JobData(NamedTuple):
+    """Parsed job data plus lookup indexes built once per load."""
+    raw: Dict[str, Any]
+    # str(position id) -> position
+    by_id: Dict[str, Dict[str, Any]]
+    # (lowercased title, position), in file order
+    titles_lower: List[Tuple[str, Dict[str, Any]]]
+    # [{"id", "title"}] projection returned by Jobs.list_jobs
+    listing: List[Dict[str, Any]]
+
+# Parsed job data keyed by path, stored with the file's mtime so edits are picked up
+_CACHE: Dict[Path, Tuple[int, JobData]] = {}
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    """Blocking read of a JSON file, meant to run off the event loop."""
+    return orjson.loads(path.read_bytes())
+
+def _index(raw: Dict[str, Any]) -> JobData:
+    positions = raw.get("positions", [])
+    return JobData(
+        raw=raw,
+        by_id={str(p["id"]): p for p in positions if p.get("id") is not None},
+        titles_lower=[(p.get("title", "").lower(), p) for p in positions],
+        listing=[{"id": p.get("id"), "title": p.get("title")} for p in positions],
+    )
+
+def load_job_data(path: Path) -> JobData:
+    """Return the parsed job data at path, re-reading it only when the file changes."""
+    mtime = path.stat().st_mtime_ns
+    entry = _CACHE.get(path)
+    if entry and entry[0] == mtime:
+        return entry[1]
+
+    data = _index(_read_json(path))
+    _CACHE[path] = (mtime, data)
+    return data
+
+async def aload_job_data(path: Path) -> JobData:
+    """Async load_job_data: cache hits return inline, misses read on a worker thread."""
+    entry = _CACHE.get(path)
+    if entry and entry[0] == path.stat().st_mtime_ns:
+        return entry[1]
+    return await asyncio.to_thread(load_job_data, path)
+
 class Jobs:
-    def __init__(self):
-        self.DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / "data"
-        self.DATA_FILE = self.DATA_DIR / "job_questions.json"
+    """Job lookups backed by the shared, mtime-checked job data cache."""
 
-    async def list_jobs(self) -> List[Dict[str, Any]]:
+    @classmethod
+    async def list_jobs(cls) -> List[Dict[str, Any]]:
         """Gets list of jobs
 
         Returns:
             Array[dict]: List of jobs with their details, such as 
             [{"id": 100,"title": "AI Consultant"},{"id": 200,"title": "Data Science"}]
         """
-        DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / "data"
-        DATA_FILE = DATA_DIR / "job_questions.json"
-
         # Check if file exists
         if not DATA_FILE.exists():
-            logger.exception(f"Job questions file not found: {DATA_FILE}")
+            logger.exception("Job questions file not found: {}", DATA_FILE)
             return None
 
         # Read and parse job questions file
         try:
-            with open(DATA_FILE, 'r') as f:
-                job_data = json.load(f)
-        except json.JSONDecodeError as e:
-            logger.exception(f"Invalid JSON in job questions file: {str(e)}")
+            job_data = await aload_job_data(DATA_FILE)
+        except (orjson.JSONDecodeError, ValueError) as e:
+            logger.exception("Invalid JSON in job questions file: {}", e)
             # If JSON is invalid, return an error response  
             return None
-        
-        logger.info(f"Job data loaded successfully from {DATA_FILE}")
 
-        positions = job_data.get("positions", [])
-
-        result = [{"id": position.get("id"), "title": position.get("title")} for position in positions]
-        logger.info(f"result {result}")
-
-        return result
+        return job_data.listing
     
-    async def get_interview_questions(self, id:str) -> List:
+    @classmethod
+    async def get_interview_questions(cls, id:str) -> List:
         """Gets details of jobs from the data file server/integration/data/job_questions.json by the job id
 
         Args:
@@ -71,28 +108,23 @@ class Jobs:
             }
         ]
         """
-        DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / "data"
-        DATA_FILE = DATA_DIR / "job_questions.json"
-
         # Check if file exists
         if not DATA_FILE.exists():
             return None
 
         # Read and parse job questions file
         try:
-            with open(DATA_FILE, 'r') as f:
-                job_data = json.load(f)
-        except json.JSONDecodeError as e:
-            logger.exception(f"Invalid JSON in job questions file: {str(e)}")
+            job_data = await aload_job_data(DATA_FILE)
+        except (orjson.JSONDecodeError, ValueError) as e:
+            logger.exception("Invalid JSON in job questions file: {}", e)
             return None
         
         # Find the job with the matching id
-        positions = job_data.get("positions", [])
-        for position in positions:
-            if str(position.get("id")) == id:
-                questions = position.get('questions', [])
-                logger.info(f"Found questions for job id {id}: {questions}")
-                return questions
+        position = job_data.by_id.get(str(id))
+        if position is not None:
+            questions = position.get('questions', [])
+            logger.info("Found questions for job id {}: {}", id, questions)
+            return questions
         
         # Return None if no matching job is found
         return None
\ No newline at end of file
@@ -22,22 +22,24 @@ Requirements:
 
 import argparse
 import os
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import Any, Dict, Union
 
 import aiohttp
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
+from loguru import logger
 
 from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper, DailyRoomParams, DailyRoomProperties, RecordingsBucketConfig, DailyMeetingTokenParams, DailyMeetingTokenProperties
 
 from datetime import datetime
 
 import asyncio
-from bot_bedrock_nova import bot_main  
+from bot_bedrock_nova import bot_main, close_session, import_bot_modules
 
 # Load environment variables from .env file
 load_dotenv(override=True)
@@ -45,40 +47,86 @@ load_dotenv(override=True)
 # Maximum number of bot instances allowed per room
 MAX_BOTS_PER_ROOM = 1
 
-# Dictionary to track bot processes: {pid: (process, room_url)}
-bot_procs = {}
+# Run each bot as a subprocess instead of an in-process task (rollback switch)
+BOT_USE_SUBPROCESS = os.getenv("BOT_USE_SUBPROCESS") == "1"
+
+@dataclass
+class BotEntry:
+    """A started bot: its subprocess or in-process task, and the room it joined."""
+    bot: Union[asyncio.subprocess.Process, asyncio.Task]
+    room_url: str
+
+
+# Dictionary to track bots: {pid or task id: BotEntry}
+bot_procs: Dict[int, BotEntry] = {}
 
 # Store Daily API helpers
 daily_helpers = {}
 
+# Worker threads for blocking calls (DynamoDB/S3 writes, file reads) made by in-process bots
+BOT_THREAD_WORKERS = int(os.getenv("BOT_THREAD_WORKERS", "32"))
+
+
+def is_running(bot) -> bool:
+    """Whether a bot task or bot subprocess is still running."""
+    if isinstance(bot, asyncio.Task):
+        return not bot.done()
+    return bot.returncode is None
+
 
-def cleanup():
-    """Cleanup function to terminate all bot processes.
+def on_bot_done(task: asyncio.Task):
+    """Report in-process bots that stopped with an error and stop tracking them.
+
+    The entry is dropped so a finished bot, and the pipeline a failed task's
+    traceback references, can be freed.
+    """
+    if not task.cancelled() and task.exception():
+        logger.opt(exception=task.exception()).error("Bot task failed")
+    bot_procs.pop(id(task), None)
+
+
+async def cleanup():
+    """Cleanup function to terminate all bot processes and tasks.
 
     Called during server shutdown.
     """
-    for entry in bot_procs.values():
-        proc = entry[0]
-        proc.terminate()
-        proc.wait()
+    bots = [entry.bot for entry in bot_procs.values()]
+    waits = []
+    for bot in bots:
+        if isinstance(bot, asyncio.Task):
+            bot.cancel()
+            waits.append(bot)
+        else:
+            if bot.returncode is None:
+                bot.terminate()
+            waits.append(bot.wait())
+    await asyncio.gather(*waits, return_exceptions=True)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan manager that handles startup and shutdown tasks.
 
+    - Sizes the default thread pool for the bots' blocking calls
+    - Warms up in-process bots' modules and shared assets
     - Creates aiohttp session
     - Initializes Daily API helper
     - Cleans up resources on shutdown
     """
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BOT_THREAD_WORKERS)
+    )
     aiohttp_session = aiohttp.ClientSession()
     daily_helpers["rest"] = DailyRESTHelper(
         daily_api_key=os.getenv("DAILY_API_KEY", ""),
         daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
         aiohttp_session=aiohttp_session,
     )
+    if not BOT_USE_SUBPROCESS:
+        await warmup_bot()
     yield
     await aiohttp_session.close()
-    cleanup()
+    await cleanup()
+    await close_session()
 
 
 # Initialize FastAPI app with lifespan manager
@@ -138,10 +186,35 @@ async def create_room_and_token() -> tuple[str, str]:
 
     return room_url, token
 
+async def warmup_bot():
+    """Import the bot's modules and load the assets every in-process bot shares.
+
+    Run once at startup so no request pays for them. The imports happen on a
+    worker thread to keep the event loop free. Failures are only logged: each
+    bot imports and loads what it needs itself anyway.
+    """
+    try:
+        await asyncio.to_thread(import_bot_modules)
+
+        from integration.jobs import Jobs
+        from talking_animation import load_sprites
+
+        await asyncio.gather(load_sprites(), Jobs.list_jobs())
+    except Exception:
+        logger.exception("Bot warmup failed")
+
+
+# Fixed parts of the health check body; only the timestamp varies per probe
+HEALTH_PREFIX = b'{"status":"ok","timestamp":"'
+HEALTH_SUFFIX = b'"}'
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+    # ISO timestamps need no JSON escaping, so the body is spliced rather than serialized
+    body = HEALTH_PREFIX + datetime.now().isoformat().encode() + HEALTH_SUFFIX
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/connect")
@@ -151,7 +224,8 @@ async def rtvi_connect(request: Request) -> Dict[Any, Any]:
     This endpoint is called by RTVI clients to establish a connection.
 
     Returns:
-        Dict[Any, Any]: Authentication bundle containing room_url and token
+        Dict[Any, Any]: Authentication bundle containing room_url and token, plus
+            the bot_id to pass to /status
 
     Raises:
         HTTPException: If room creation, token generation, or bot startup fails
@@ -160,41 +234,39 @@ async def rtvi_connect(request: Request) -> Dict[Any, Any]:
     room_url, token = await create_room_and_token()
     print(f"Room URL: {room_url}")
 
-    # Start the bot process
+    # Start the bot
+    if not BOT_USE_SUBPROCESS:
+        task = asyncio.create_task(bot_main(room_url, token))
+        task.add_done_callback(on_bot_done)
+        bot_procs[id(task)] = BotEntry(task, room_url)
+        return {"room_url": room_url, "token": token, "bot_id": id(task)}
+
     try:
         # bot_file = get_bot_file()
         bot_file = "bot_bedrock_nova"
-        command = f"python3 -m {bot_file} -u {room_url} -t {token}"
         working_dir = os.path.dirname(os.path.abspath(__file__))
 
-        # proc = await asyncio.create_subprocess_shell(
-        #     command,
-        #     cwd=working_dir,
-        #     stdout=asyncio.subprocess.PIPE,
-        #     stderr=asyncio.subprocess.PIPE
-        # )
-
-        proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token}"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
+        # Spawned without a shell; the bot's output is inherited as before
+        proc = await asyncio.create_subprocess_exec(
+            "python3", "-m", bot_file, "-u", room_url, "-t", token,
+            cwd=working_dir,
         )
 
-        bot_procs[proc.pid] = (proc, room_url)
+        bot_procs[proc.pid] = BotEntry(proc, room_url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
 
     # Return the authentication bundle in format expected by DailyTransport
-    return {"room_url": room_url, "token": token}
+    return {"room_url": room_url, "token": token, "bot_id": proc.pid}
 
 
 @app.get("/status/{pid}")
 def get_status(pid: int):
-    """Get the status of a specific bot process.
+    """Get the status of a specific bot process or task.
 
     Args:
-        pid (int): Process ID of the bot
+        pid (int): Process ID of the bot, or the task id when running in-process.
+            In-process bots are no longer tracked once they finish.
 
     Returns:
         JSONResponse: Status information for the bot
@@ -203,14 +275,14 @@ def get_status(pid: int):
         HTTPException: If the specified bot process is not found
     """
     # Look up the subprocess
-    proc = bot_procs.get(pid)
+    entry = bot_procs.get(pid)
 
     # If the subprocess doesn't exist, return an error
-    if not proc:
+    if entry is None:
         raise HTTPException(status_code=404, detail=f"Bot with process id: {pid} not found")
 
     # Check the status of the subprocess
-    status = "running" if proc[0].poll() is None else "finished"
+    status = "running" if is_running(entry.bot) else "finished"
     return JSONResponse({"bot_id": pid, "status": status})
 
 
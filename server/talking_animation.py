@@ -0,0 +1,128 @@
+import asyncio
+import os
+
+from PIL import Image
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    Frame,
+    OutputImageRawFrame,
+    SpriteFrame,
+    StartFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+script_dir = os.path.dirname(__file__)
+
+# (quiet_frame, talking_frame), decoded on first use and shared by every bot
+_sprite_frames = None
+_sprites_lock = asyncio.Lock()
+
+
+def _decode_one(path):
+    """Decode a single PNG file into raw bytes, size and format."""
+    with Image.open(path) as img:
+        return img.tobytes(), img.size, img.format
+
+
+async def load_sprites():
+    """Load the animation frames once, decoding the PNG files concurrently.
+
+    Returns:
+        tuple: (quiet_frame, talking_frame), the static frame shown while the
+        bot is listening and the animation sequence shown while it is talking
+    """
+    global _sprite_frames
+
+    async with _sprites_lock:
+        if _sprite_frames is None:
+            # Load sequential animation frames
+            paths = [os.path.join(script_dir, f"assets/robot0{i}.png") for i in range(1, 26)]
+            decoded = await asyncio.gather(*[asyncio.to_thread(_decode_one, p) for p in paths])
+            # Create a smooth animation by placing each frame in both the forward
+            # and the reversed half of a single preallocated list
+            count = len(decoded)
+            sprites = [None] * (2 * count)
+            for i, (image, size, format) in enumerate(decoded):
+                frame = OutputImageRawFrame(image=image, size=size, format=format)
+                sprites[i] = frame
+                sprites[2 * count - 1 - i] = frame
+
+            _sprite_frames = (sprites[0], SpriteFrame(images=sprites))
+
+    return _sprite_frames
+
+
+class TalkingAnimation(FrameProcessor):
+    """Manages the bot's visual animation states.
+
+    Switches between static (listening) and animated (talking) states based on
+    the bot's current speaking status.
+    """
+
+    def __init__(self, quiet_frame: Frame, talking_frame: Frame):
+        super().__init__()
+        self._quiet_frame = quiet_frame
+        self._talking_frame = talking_frame
+        self._is_talking = False
+        # Animation frames are pushed by a writer task so transport back-pressure
+        # never holds up the frames flowing through this processor
+        self._animation_queue = asyncio.Queue(maxsize=2)
+        self._animation_task = None
+        # Exact-type dispatch, so frames that don't affect the animation cost one dict lookup
+        self._handlers = {
+            StartFrame: self._start_animation_task,
+            EndFrame: self._stop_animation_task,
+            CancelFrame: self._stop_animation_task,
+            BotStartedSpeakingFrame: self._on_started_speaking,
+            BotStoppedSpeakingFrame: self._on_stopped_speaking,
+        }
+
+    async def _start_animation_task(self):
+        if not self._animation_task:
+            self._animation_task = self.create_task(self._animation_task_handler())
+
+    async def _stop_animation_task(self):
+        if self._animation_task:
+            await self.cancel_task(self._animation_task)
+            self._animation_task = None
+
+    async def _animation_task_handler(self):
+        while True:
+            frame = await self._animation_queue.get()
+            await self.push_frame(frame)
+
+    def _queue_animation(self, frame: Frame):
+        """Queue an animation frame; only the latest state matters if the writer lags."""
+        if self._animation_queue.full():
+            self._animation_queue.get_nowait()
+        self._animation_queue.put_nowait(frame)
+
+    async def _on_started_speaking(self):
+        """Switch to talking animation when bot starts speaking."""
+        if not self._is_talking:
+            self._queue_animation(self._talking_frame)
+            self._is_talking = True
+
+    async def _on_stopped_speaking(self):
+        """Return to static frame when bot stops speaking."""
+        self._queue_animation(self._quiet_frame)
+        self._is_talking = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        """Process incoming frames and update animation state.
+
+        Args:
+            frame: The incoming frame to process
+            direction: The direction of frame flow in the pipeline
+        """
+        await super().process_frame(frame, direction)
+
+        handler = self._handlers.get(type(frame))
+        if handler is not None:
+            await handler()
+
+        await self.push_frame(frame, direction)
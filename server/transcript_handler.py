@@ -1,113 +1,433 @@
+import asyncio
+import functools
+import hashlib
 import os
+import random
+import threading
+import uuid
+from collections import deque
 import boto3
+import orjson
+import zstandard
+from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.types import Binary
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from datetime import datetime
 from loguru import logger
 
+# DynamoDB BatchWriteItem accepts at most 25 puts per request
+BATCH_SIZE = 25
+# Seconds the writer waits to fill a batch before writing what it has
+BATCH_WINDOW = 0.2
+# Messages that may wait for the writer before new ones are dropped
+QUEUE_MAXSIZE = 1024
+# Recent message fingerprints remembered to skip re-sent copies of a message
+DEDUP_WINDOW = 128
+# Batch write attempts before giving up, with full-jitter backoff between them
+WRITE_ATTEMPTS = 6
+BACKOFF_BASE = 0.05  # seconds
+BACKOFF_CAP = 5.0  # seconds
+RETRYABLE_ERRORS = ("ProvisionedThroughputExceededException", "ThrottlingException")
+# Seconds shutdown waits for queued messages to be written before giving up on them
+DRAIN_TIMEOUT = 5.0
+# Messages kept in memory for the final transcript; older ones are spilled in chunks
+MAX_IN_MEMORY = 10_000
+SPILL_CHUNK = 500
+# zstd level for stored transcripts; transcripts are repetitive and compress well
+ZSTD_LEVEL = 6
+# Compressed transcripts above this size go to S3, well below DynamoDB's 400 KB item limit
+S3_OFFLOAD_THRESHOLD = 300_000
+
+
+# boto3 handles are shared by every handler in the process so they reuse one
+# set of loaded service models and connection pools. Building them loads
+# credentials and models, so they are only requested from worker threads; the
+# lock keeps two threads from building the same handle at once.
+_clients_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _boto3_session(profile):
+    return boto3.Session(profile_name=profile)
+
+
+# Room for many concurrent sessions. One attempt per call: _write retries batches
+# with its own jittered backoff, and SDK retries stacked under it could keep a
+# batch going well past DRAIN_TIMEOUT
+_DYNAMODB_CONFIG = Config(max_pool_connections=50, retries={"mode": "standard", "max_attempts": 1})
+
+
+@functools.lru_cache(maxsize=8)
+def _shared_dynamodb(profile, region):
+    # boto3 resources are not thread-safe but clients are, so only the
+    # resource's client is shared. It keeps the resource's handlers, so it
+    # still takes plain Python values and boto3 condition objects.
+    return _boto3_session(profile).resource(
+        "dynamodb", region_name=region, config=_DYNAMODB_CONFIG
+    ).meta.client
+
+
+@functools.lru_cache(maxsize=8)
+def _shared_s3(profile):
+    return _boto3_session(profile).client("s3")
+
+
+def _compress_transcript(transcript):
+    """Serialize a formatted transcript to compact JSON and zstd-compress it."""
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(orjson.dumps(transcript))
+
 
 class TranscriptHandler:
+    # One handler exists per bot session, so skip the per-instance __dict__
+    __slots__ = (
+        "messages", "_spilled_ids", "transport", "username", "session_id",
+        "_table_name", "_profile", "_region", "_s3_bucket", "_dropped",
+        "_queue", "_writer_task", "_warmup_task", "_recent", "_recent_set", "_item_template",
+    )
+
     def __init__(self, transport=None, username=None, session_id=None):
-        self.messages = []
+        self.messages = deque()
+        # conversation_ids of "partial" transcript chunks already spilled to DynamoDB
+        self._spilled_ids = []
         # Store the transport if provided
         self.transport = transport
         
         # Store the username or use a default
         self.username = username or os.getenv("DEFAULT_USERNAME", "default_user")
         
-        self.session_id = session_id or None
-
-        # Initialize DynamoDB client if table name is provided
-        self.dynamodb_client = None
-        dynamodb_table_name = os.getenv("DYNAMODB_TABLE_NAME")
-        if dynamodb_table_name:
-            session = boto3.Session(profile_name=os.getenv("AWS_PROFILE", None))
-            self.dynamodb_client = session.resource(
-                "dynamodb",
-                region_name=os.getenv("DYNAMODB_AWS_REGION", "us-east-1")
-            ).Table(dynamodb_table_name)
-            logger.info(f"DynamoDB integration enabled with table: {dynamodb_table_name}")
-        
-        # Schedule a test transcript message to be sent after initialization
-        self.send_test_transcript = True
+        self.session_id = session_id
+        # Fields shared by every message item; rebuilt when the username changes
+        self._item_template = {"username": self.username, "session_id": self.session_id}
+
+        # DynamoDB is enabled when a table name is provided; the client
+        # itself is built on first write, see _get_dynamodb
+        self._table_name = os.getenv("DYNAMODB_TABLE_NAME")
+        self._profile = os.getenv("AWS_PROFILE", None)
+        self._region = os.getenv("DYNAMODB_AWS_REGION", "us-east-1")
+        # Bucket for transcripts too large to store in DynamoDB
+        self._s3_bucket = os.getenv("TRANSCRIPT_S3_BUCKET")
+        # Messages given up on after repeated throttling or errors
+        self._dropped = 0
+        if self._table_name:
+            logger.info("DynamoDB integration enabled with table: {}", self._table_name)
+
+        # Message items waiting for the writer task, which batches them
+        self._queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+        self._writer_task = None
+        # Background warmup started by start_warmup, awaited before the first write
+        self._warmup_task = None
+
+        # Fingerprints of recently stored messages; the set mirrors the deque for lookups
+        self._recent = deque()
+        self._recent_set = set()
+
+    def _get_dynamodb(self):
+        """Return the shared DynamoDB client; call from a worker thread."""
+        with _clients_lock:
+            return _shared_dynamodb(self._profile, self._region)
+
+    def _put_item(self, item, **kwargs):
+        """Blocking put_item on the handler's table, for use with asyncio.to_thread."""
+        return self._get_dynamodb().put_item(TableName=self._table_name, Item=item, **kwargs)
+
+    def _get_s3(self):
+        """Return the shared S3 client for offloaded transcripts; call from a worker thread."""
+        with _clients_lock:
+            return _shared_s3(self._profile)
+
+    async def _attach_transcript(self, item, blob):
+        """Put a compressed transcript on the item, or in S3 with a pointer when it is too large."""
+        if len(blob) <= S3_OFFLOAD_THRESHOLD or not self._s3_bucket:
+            item["full_transcript_zstd"] = Binary(blob)
+            return
+
+        key = f"transcripts/{item['username']}/{item['conversation_id']}.json.zst"
+        await asyncio.to_thread(
+            lambda: self._get_s3().put_object(
+                Bucket=self._s3_bucket, Key=key, Body=blob, ContentEncoding="zstd"
+            )
+        )
+        item["transcript_s3_bucket"] = self._s3_bucket
+        item["transcript_s3_key"] = key
+        item["transcript_sha256"] = hashlib.sha256(blob).hexdigest()
+
+    async def warmup(self):
+        """Build the DynamoDB client and open a pooled connection before the first write."""
+        if not self._table_name:
+            return
+        try:
+            await asyncio.to_thread(
+                lambda: self._get_dynamodb().describe_table(TableName=self._table_name)
+            )
+        except Exception as e:
+            logger.warning("DynamoDB warmup failed: {}", e)
+
+    def start_warmup(self):
+        """Run warmup() in the background so callers don't wait on it.
+
+        The writer waits for it to finish before writing its first batch.
+        """
+        if self._table_name and self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self.warmup())
 
     async def on_transcript_update(self, processor, frame):
         self.messages.extend(frame.messages)
+        if len(self.messages) > MAX_IN_MEMORY:
+            await self._spill_oldest()
         
+        username = self.username
+
         # Log new messages with timestamps
         for msg in frame.messages:
-            timestamp = f"[{msg.timestamp}] " if msg.timestamp else datetime.now().isoformat()
-            message = f"{msg.role}: {msg.content}"
-            print(f"{timestamp}{message}")
+            # Empty or whitespace-only partials carry nothing worth a write
+            content = msg.content
+            if not content or content.isspace():
+                continue
+
+            # One clock read per message, shared by the log line and the stored item
+            now_iso = datetime.now().isoformat()
+            timestamp = f"[{msg.timestamp}] " if msg.timestamp else now_iso
+            message = f"{msg.role}: {content}"
+            logger.info("{}{}", timestamp, message)
+
+            # Skip re-sent copies of a message within the recent window. The
+            # timestamp is part of the fingerprint so genuinely repeated turns
+            # (two separate "Yes." answers) are still stored; without one there
+            # is no telling a copy from a repeat, so nothing is skipped.
+            if msg.timestamp:
+                fingerprint = hashlib.blake2b(f"{msg.timestamp} {message}".encode(), digest_size=8).digest()
+                if fingerprint in self._recent_set:
+                    continue
+                self._recent.append(fingerprint)
+                self._recent_set.add(fingerprint)
+                if len(self._recent) > DEDUP_WINDOW:
+                    self._recent_set.discard(self._recent.popleft())
             
             # Store individual message in DynamoDB if configured
-            await self.store_conversation(message)
+            await self.store_conversation(message, now_iso=now_iso, username=username)
                     
     # Function to store conversation in DynamoDB
-    async def store_conversation(self, message, username=None):
-        """Store conversation in DynamoDB."""
-        if not self.dynamodb_client:
+    async def store_conversation(self, message, *, now_iso=None, username=None):
+        """Store conversation in DynamoDB.
+
+        now_iso is the caller's ISO timestamp for the message, read from the clock if omitted.
+        """
+        if not self._table_name:
             logger.debug("DynamoDB integration not enabled, skipping storage")
             return
 
         try:
             # Use provided username or fall back to the instance username
             username = username or self.username
-            timestamp = datetime.now().isoformat()
-            conversation_id = f"{timestamp}"
+            timestamp = now_iso or datetime.now().isoformat()
+            # Random ids spread writes across partitions and never collide within a batch;
+            # the timestamp attribute still records message order
+            conversation_id = uuid.uuid4().hex
             
+            item = self._item_template.copy()
+            if username != self.username:
+                item["username"] = username
+            item["conversation_id"] = conversation_id
+            item["timestamp"] = timestamp
+            item["conversation"] = message
+            if self._writer_task is None:
+                self._writer_task = asyncio.create_task(self._writer_loop())
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            logger.warning("DynamoDB write queue full, dropping message for user {}", username)
+        except Exception as e:
+            logger.error("Error storing conversation in DynamoDB: {}", e)
+
+    async def _writer_loop(self):
+        """Drain the queue, writing up to BATCH_SIZE items or BATCH_WINDOW seconds' worth at a time."""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + BATCH_WINDOW
+            while len(items) < BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                if self._warmup_task is not None:
+                    await self._warmup_task
+                    self._warmup_task = None
+                await self._write(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    async def _write(self, items):
+        """Write a batch of message items to DynamoDB.
+
+        Throttling errors and UnprocessedItems are retried with full-jitter
+        exponential backoff; anything still unwritten after WRITE_ATTEMPTS, or
+        after any other error, falls back to one conditional put per item.
+        """
+        requests = [{"PutRequest": {"Item": item}} for item in items]
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                response = await asyncio.to_thread(self._batch_write_item, requests)
+                requests = response.get("UnprocessedItems", {}).get(self._table_name, [])
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in RETRYABLE_ERRORS:
+                    await self._write_individually(requests, e)
+                    return
+            except Exception as e:
+                await self._write_individually(requests, e)
+                return
+
+            if not requests:
+                logger.debug("Stored {} conversation messages in DynamoDB for user {}", len(items), self.username)
+                return
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+        await self._write_individually(requests, f"still unprocessed after {WRITE_ATTEMPTS} attempts")
+
+    async def _write_individually(self, requests, reason):
+        """Fallback for a failed batch: put each item on its own, dropping those that still fail.
+
+        The puts are conditional on the item not existing yet, so an item whose
+        batch write did land (e.g. before a timeout) is not written a second time.
+        """
+        failed = []
+        for request in requests:
+            try:
+                await asyncio.to_thread(self._put_if_absent, request["PutRequest"]["Item"])
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    failed.append(request)
+            except Exception:
+                failed.append(request)
+        if failed:
+            self._drop(failed, reason)
+
+    def _put_if_absent(self, item):
+        """Blocking put that DynamoDB rejects if the item's conversation_id is already stored."""
+        self._put_item(item, ConditionExpression=Attr("conversation_id").not_exists())
+
+    def _drop(self, requests, reason):
+        self._dropped += len(requests)
+        logger.error("Error storing conversation batch in DynamoDB, dropped {} messages ({} total): {}", len(requests), self._dropped, reason)
+
+    def _batch_write_item(self, requests):
+        """Blocking BatchWriteItem call, run on a worker thread to keep the event loop free."""
+        return self._get_dynamodb().batch_write_item(
+            RequestItems={self._table_name: requests}
+        )
+
+
+    @staticmethod
+    def _format_transcript(messages, default_timestamp):
+        """Format messages for a transcript item, stamping those without a timestamp."""
+        return [
+            {"timestamp": msg.timestamp or default_timestamp, "role": msg.role, "content": msg.content}
+            for msg in messages
+        ]
+
+    async def _spill_oldest(self):
+        """Move the oldest messages out of memory until at most MAX_IN_MEMORY remain.
+
+        With DynamoDB enabled they are stored as "partial" transcript chunks that the
+        final transcript references; otherwise nothing would store them, so they are dropped.
+        """
+        while len(self.messages) > MAX_IN_MEMORY:
+            chunk = [self.messages.popleft() for _ in range(SPILL_CHUNK)]
+            if not self._table_name:
+                continue
+
+            timestamp = datetime.now().isoformat()
+            # Scoped to the session: usernames are shared, so a username/date id
+            # would let concurrent sessions overwrite each other's chunks
+            conversation_id = f"{self.session_id or uuid.uuid4().hex}_part{len(self._spilled_ids) + 1}"
             item = {
-                "username": username,
+                "username": self.username,
                 "session_id": self.session_id,
                 "conversation_id": conversation_id,
                 "timestamp": timestamp,
-                "conversation": message
+                "transcript_type": "partial",
             }
-            self.dynamodb_client.put_item(Item=item)
-            logger.debug(f"Stored conversation in DynamoDB for user {username}: {conversation_id}")
-        except Exception as e:
-            logger.error(f"Error storing conversation in DynamoDB: {e}")
+            try:
+                blob = await asyncio.to_thread(_compress_transcript, self._format_transcript(chunk, timestamp))
+                await self._attach_transcript(item, blob)
+                await asyncio.to_thread(self._put_item, item)
+                self._spilled_ids.append(conversation_id)
+            except Exception as e:
+                logger.error("Error storing partial transcript in DynamoDB: {}", e)
             
+    async def close(self, timeout=DRAIN_TIMEOUT):
+        """Give the writer up to timeout seconds to drain the queue, then stop it.
+
+        Safe to call more than once; messages still queued when the time runs
+        out are dropped, so a throttled table can't hold up the bot's shutdown.
+        """
+        if self._writer_task is None:
+            # No writer is waiting on the warmup, so it is no longer needed
+            if self._warmup_task is not None:
+                self._warmup_task.cancel()
+                self._warmup_task = None
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("DynamoDB writer did not drain in {}s, dropping {} queued messages", timeout, self._queue.qsize())
+        finally:
+            self._writer_task.cancel()
+            self._writer_task = None
+
     def set_transport(self, transport):
         """Set the transport to use for sending messages to the frontend."""
         self.transport = transport
-        logger.debug(f"[TRANSCRIPT DEBUG] Transport set: {transport.__class__.__name__}")
+        logger.debug("[TRANSCRIPT DEBUG] Transport set: {}", transport.__class__.__name__)
         
     def set_username(self, username):
         """Set the username for this transcript handler."""
         self.username = username
-        logger.debug(f"[TRANSCRIPT DEBUG] Username set: {username}")
+        self._item_template = {"username": username, "session_id": self.session_id}
+        logger.debug("[TRANSCRIPT DEBUG] Username set: {}", username)
         
     
     async def on_participant_left(self, transport, participant, reason=None):
         """Handle participant left event by storing the full transcript in DynamoDB."""
-        logger.info(f"Participant left: {participant}, reason: {reason}")
+        logger.info("Participant left: {}, reason: {}", participant, reason)
+
+        # Let the writer drain queued messages before the final transcript
+        await self.close()
         
         # Store the full transcript in DynamoDB when a participant leaves
-        if self.messages and self.dynamodb_client:
+        if (self.messages or self._spilled_ids) and self._table_name:
             try:
                 username = self.username
                 timestamp = datetime.now().isoformat()
-                conversation_id = f"{username}_{timestamp.split('T')[0]}"
+                # Scoped to the session like the partial chunks, so concurrent sessions
+                # of the same user don't overwrite one item and S3 object
+                conversation_id = f"{self.session_id or uuid.uuid4().hex}_final"
                 
-                # Create a formatted transcript with all messages
-                full_transcript = []
-                for msg in self.messages:
-                    msg_timestamp = f"[{msg.timestamp}] " if msg.timestamp else ""
-                    full_transcript.append({
-                        "timestamp": msg_timestamp or datetime.now().isoformat(),
-                        "role": msg.role,
-                        "content": msg.content
-                    })
+                # Create a formatted transcript with all messages still in memory
+                full_transcript = self._format_transcript(self.messages, timestamp)
                 
+                # Stored as zstd-compressed JSON to save write units and stay under the item size limit
+                blob = await asyncio.to_thread(_compress_transcript, full_transcript)
+
                 # Create the DynamoDB item - use same format as on_transcript_update for consistency
                 item = {
                     "username": username,
+                    "session_id": self.session_id,
                     "conversation_id": conversation_id,
                     "timestamp": timestamp,
                     "transcript_type": "final",  # Mark this as the final transcript
-                    "full_transcript": full_transcript
                 }
+                await self._attach_transcript(item, blob)
+                # Earlier messages of long sessions live in these partial chunks
+                if self._spilled_ids:
+                    item["partial_transcripts"] = self._spilled_ids
                 
-                self.dynamodb_client.put_item(Item=item)
-                logger.info(f"Stored full transcript in DynamoDB on participant left for user {username}: {conversation_id}")
+                await asyncio.to_thread(self._put_item, item)
+                logger.info("Stored full transcript in DynamoDB on participant left for user {}: {}", username, conversation_id)
             except Exception as e:
-                logger.error(f"Error storing full transcript in DynamoDB on participant left: {e}")
\ No newline at end of file
+                logger.error("Error storing full transcript in DynamoDB on participant left: {}", e)
\ No newline at end of file